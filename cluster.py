@@ -25,6 +25,8 @@ There are 6 functions support for setup environment store data:
     - connect_database: Connection to database
     
     - check_redshift_cluster_status: Check redshift is running or not
+
+    - build_wlm_configuration: Build WLM queues from WLM part of dwh.cfg file
 """
 
 def get_config():
@@ -146,9 +148,49 @@ def check_redshift_cluster_status(config, redshift):
         return None
     return cluster_status['Clusters'][0]
 
+def build_wlm_configuration(config):
+    """Build the workload management configuration
+    from the WLM section in the config file. Pipeline statements
+    tagged with the ETL query group land in their own queue,
+    ad-hoc work goes to a separate one and everything else falls
+    into the default queue.
+
+    Args:
+        config (configuration): Configure to get WLM queues
+    Returns:
+        wlm_configuration (list): queues for wlm_json_configuration parameter
+    """
+    concurrency_scaling = config.get('WLM', 'CONCURRENCY_SCALING')
+    wlm_configuration = [
+        {
+            'name': 'etl',
+            'query_group': [config.get('WLM', 'ETL_QUERY_GROUP')],
+            'user_group': [],
+            'auto_wlm': True,
+            'priority': config.get('WLM', 'ETL_PRIORITY'),
+            'concurrency_scaling': concurrency_scaling
+        },
+        {
+            'name': 'adhoc',
+            'query_group': [config.get('WLM', 'ADHOC_QUERY_GROUP')],
+            'user_group': [],
+            'auto_wlm': True,
+            'priority': config.get('WLM', 'ADHOC_PRIORITY'),
+            'concurrency_scaling': concurrency_scaling
+        },
+        {
+            'name': 'Default queue',
+            'auto_wlm': True,
+            'priority': 'normal'
+        }
+    ]
+    if config.getboolean('WLM', 'SHORT_QUERY_ACCELERATION'):
+        wlm_configuration.append({'short_query_queue': True})
+    return wlm_configuration
+
 # Start redshift
 """
-There are 4 functions to create resource to store data
+There are 5 functions to create resource to store data
     - create_bucket: Create an S3 bucket in a specified region
     
     - create_ec2: Create ec2 client to open incomming TCP Port
@@ -156,6 +198,9 @@ There are 4 functions to create resource to store data
     
     - create_iam: Create IAM creates the neccessary iam role 
     and policy to be able to read from S3
+
+    - create_parameter_group: Create or update parameter group
+    holding the WLM queues attached to the cluster
     
     - create_redshift_cluster: initiates the creation of a redshift cluster created based on the 
     cluster parameters given in the config file (dwh.cfg)
@@ -253,6 +298,49 @@ def create_iam(config):
     print('Successfully Created Role, and Attached S3 Read-Only Policy.')
     return role
 
+def create_parameter_group(config, redshift):
+    """Create parameter group
+    creates the cluster parameter group given in the config file
+    if it does not exist yet, then applies the WLM queues and
+    concurrency scaling settings to it. wlm_json_configuration is a
+    static parameter, so a running cluster only picks up the new
+    queues after it is rebooted.
+
+    Parameters:
+    config: config object
+    redshift: redshift boto3 client
+    Returns:
+    parameter_group_name: name of the parameter group
+    """
+    parameter_group_name = config.get('WLM', 'PARAMETER_GROUP_NAME')
+    try:
+        redshift.create_cluster_parameter_group(
+            ParameterGroupName=parameter_group_name,
+            ParameterGroupFamily=config.get('WLM', 'PARAMETER_GROUP_FAMILY'),
+            Description='Sparkify WLM queues for ETL and ad-hoc work'
+        )
+        print('Created parameter group', parameter_group_name)
+    except redshift.exceptions.ClusterParameterGroupAlreadyExistsFault:
+        print('Parameter group already exists.')
+
+    redshift.modify_cluster_parameter_group(
+        ParameterGroupName=parameter_group_name,
+        Parameters=[
+            {
+                'ParameterName': 'wlm_json_configuration',
+                'ParameterValue': json.dumps(build_wlm_configuration(config)),
+                'ApplyType': 'static'
+            },
+            {
+                'ParameterName': 'max_concurrency_scaling_clusters',
+                'ParameterValue': config.get('WLM', 'MAX_CONCURRENCY_SCALING_CLUSTERS'),
+                'ApplyType': 'dynamic'
+            }
+        ]
+    )
+    print('Applied WLM configuration to parameter group', parameter_group_name)
+    return parameter_group_name
+
 def create_redshift_cluster(config, ec2, iam_role):
     """create redshift cluster
     initiates the creation of a redshift cluster created based on the 
@@ -272,6 +360,8 @@ def create_redshift_cluster(config, ec2, iam_role):
         region_name=config.get('AWS_ACCESS', 'AWS_REGION'), 
     )
 
+    parameter_group_name = create_parameter_group(config, redshift)
+
     print('Creating Redshift Cluster...')
     try:
         response = redshift.create_cluster(
@@ -285,7 +375,8 @@ def create_redshift_cluster(config, ec2, iam_role):
             IamRoles=[
                 iam_role['Role']['Arn']
             ],
-            NumberOfNodes=int(config.get('CLUSTER', 'NODE_COUNT'))
+            NumberOfNodes=int(config.get('CLUSTER', 'NODE_COUNT')),
+            ClusterParameterGroupName=parameter_group_name
         )
         print('Create Cluster Call Made.')
     except Exception as e:
@@ -332,9 +423,10 @@ def create_tables_from_file(conn, cur, path_to_file):
 
 # Stop redshift
 """
-There is 2 functions that stop redshift cluster:
+There is 3 functions that stop redshift cluster:
     - remove_iam: Remove iam remove the IAM roles and policies created
     - delete_redshift_cluster: Delete redshift cluster
+    - delete_parameter_group: Delete parameter group holding WLM queues
 """
 def remove_iam(config):
     """remove iam
@@ -406,17 +498,274 @@ def delete_redshift_cluster(config):
         time.sleep(5)
         print('Time since delete actioned', time.time() - cluster_delete_actioned)
 
+def delete_parameter_group(config):
+    """delete parameter group
+
+    delete parameter group should remove the parameter group
+    created for the WLM queues, once no cluster uses it anymore
+
+    Parameters:
+    config: configuration object
+
+    """
+    redshift = boto3.client(
+        'redshift',
+        aws_access_key_id=config.get('AWS_ACCESS', 'AWS_ACCESS_KEY_ID'),
+        aws_secret_access_key=config.get('AWS_ACCESS', 'AWS_SECRET_ACCESS_KEY'),
+        region_name=config.get('AWS_ACCESS', 'AWS_REGION'), 
+    )
+    try:
+        redshift.delete_cluster_parameter_group(
+            ParameterGroupName=config.get('WLM', 'PARAMETER_GROUP_NAME')
+        )
+        print('deleted parameter group.')
+    except Exception as e:
+        print('could not delete parameter group', e)
+
+# Scale redshift
+"""
+There are 5 functions that scale redshift cluster with the pipeline load:
+    - get_pipeline_metrics: Read queue depth and recent ETL query durations
+    - decide_scaling: Decide to resize, pause or resume from the metrics
+    - log_scaling_decision: Append decision to the decision log
+    - apply_scaling_decision: Run elastic resize, pause or resume
+    - simulate_scaling: Replay simulated metrics through the policy offline
+"""
+def get_pipeline_metrics(config, cur, pending_runs=0):
+    """Get pipeline metrics
+    reads how many queries wait in the WLM queues, how long the
+    ETL queries took and how long the ETL queue has been idle
+    over the recent window given in the config file.
+
+    Parameters:
+    config: configuration object
+    cur: cursor connected to the redshift cluster
+    pending_runs: DAG runs waiting to run, e.g. the size of a backfill
+    Returns:
+    metrics: dictionary of the pipeline metrics
+    """
+    query_group = config.get('WLM', 'ETL_QUERY_GROUP')
+    window_minutes = config.getint('SCALING', 'METRICS_WINDOW_MINUTES')
+
+    cur.execute("SELECT COUNT(*) FROM stv_wlm_query_state WHERE state LIKE 'Queued%';")
+    queue_depth = cur.fetchone()[0]
+    cur.execute(f"""
+        SELECT COALESCE(MAX(DATEDIFF(second, starttime, endtime)), 0)
+        FROM stl_query
+        WHERE label = '{query_group}'
+          AND starttime > DATEADD(minute, -{window_minutes}, GETDATE());
+    """)
+    max_stage_seconds = cur.fetchone()[0]
+    cur.execute(f"""
+        SELECT DATEDIFF(minute, MAX(endtime), GETDATE())
+        FROM stl_query
+        WHERE label = '{query_group}';
+    """)
+    idle_minutes = cur.fetchone()[0]
+    return {
+        'pending_runs': pending_runs,
+        'queue_depth': queue_depth,
+        'max_stage_seconds': max_stage_seconds,
+        'idle_minutes': window_minutes if idle_minutes is None else idle_minutes
+    }
+
+def decide_scaling(config, metrics, cluster_status, node_count):
+    """Decide scaling
+    scales up before backfills or when ETL queries get slow, scales
+    down and then pauses after idle windows, and resumes a paused
+    cluster when work is waiting. Targets follow elastic resize
+    (double or half the nodes) and stay within the node and hourly
+    cost limits given in the config file.
+
+    Parameters:
+    config: configuration object
+    metrics: pipeline metrics, see get_pipeline_metrics
+    cluster_status: ClusterStatus of the redshift cluster
+    node_count: current number of nodes
+    Returns:
+    decision: dictionary with action, target_nodes and reason
+    """
+    min_nodes = config.getint('SCALING', 'MIN_NODE_COUNT')
+    max_nodes = min(
+        config.getint('SCALING', 'MAX_NODE_COUNT'),
+        int(config.getfloat('SCALING', 'MAX_HOURLY_COST') / config.getfloat('SCALING', 'HOURLY_COST_PER_NODE'))
+    )
+    waiting = metrics['pending_runs'] + metrics['queue_depth']
+    decision = {'action': 'none', 'target_nodes': node_count, 'reason': 'within limits'}
+
+    if cluster_status == 'paused':
+        if waiting:
+            decision.update(action='resume', reason=f'{waiting} runs/queries waiting on paused cluster')
+        else:
+            decision.update(reason='paused and no work waiting')
+    elif cluster_status != 'available':
+        decision.update(reason=f'cluster is {cluster_status}')
+    elif (metrics['pending_runs'] >= config.getint('SCALING', 'BACKFILL_PENDING_RUNS')
+          or metrics['max_stage_seconds'] >= config.getint('SCALING', 'SLOW_STAGE_SECONDS')):
+        target = min(max_nodes, node_count * 2)
+        if target > node_count:
+            decision.update(action='resize', target_nodes=target,
+                            reason=f"{metrics['pending_runs']} pending runs, "
+                                   f"slowest ETL query {metrics['max_stage_seconds']}s")
+        else:
+            decision.update(reason='busy but already at node/cost limit')
+    elif not waiting and metrics['idle_minutes'] >= config.getint('SCALING', 'IDLE_MINUTES'):
+        if node_count > min_nodes:
+            decision.update(action='resize', target_nodes=max(min_nodes, node_count // 2),
+                            reason=f"idle for {metrics['idle_minutes']} minutes")
+        elif config.getboolean('SCALING', 'PAUSE_WHEN_IDLE'):
+            decision.update(action='pause', reason=f"idle for {metrics['idle_minutes']} minutes at minimum size")
+
+    running = decision['action'] != 'pause' and (cluster_status != 'paused' or decision['action'] == 'resume')
+    decision['hourly_cost'] = round(
+        running * decision['target_nodes'] * config.getfloat('SCALING', 'HOURLY_COST_PER_NODE'), 2)
+    return decision
+
+def log_scaling_decision(config, metrics, decision):
+    """Append the scaling decision and the metrics it was based on
+    as one JSON line to the decision log given in the config file.
+
+    Args:
+        config (configuration): Configure to get decision log path
+        metrics (dict): pipeline metrics
+        decision (dict): scaling decision
+    """
+    entry = {
+        'time': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+        'cluster_identifier': config.get('CLUSTER', 'CLUSTER_IDENTIFIER'),
+        'metrics': metrics,
+        'decision': decision
+    }
+    with open(config.get('SCALING', 'DECISION_LOG'), 'a') as decision_log:
+        decision_log.write(json.dumps(entry) + '\n')
+
+def apply_scaling_decision(config, redshift, decision):
+    """Apply scaling decision
+    runs the elastic resize, pause or resume for the decision.
+
+    Parameters:
+    config: configuration object
+    redshift: redshift boto3 client
+    decision: scaling decision, see decide_scaling
+    """
+    cluster_identifier = config.get('CLUSTER', 'CLUSTER_IDENTIFIER')
+    try:
+        if decision['action'] == 'resize':
+            redshift.resize_cluster(
+                ClusterIdentifier=cluster_identifier,
+                NumberOfNodes=decision['target_nodes'],
+                Classic=False
+            )
+            update_configfile({'NODE_COUNT': str(decision['target_nodes'])}, 'CLUSTER')
+        elif decision['action'] == 'pause':
+            redshift.pause_cluster(ClusterIdentifier=cluster_identifier)
+        elif decision['action'] == 'resume':
+            redshift.resume_cluster(ClusterIdentifier=cluster_identifier)
+        else:
+            print('No scaling needed:', decision['reason'])
+            return
+        print(f"Scaling action {decision['action']} made:", decision['reason'])
+    except Exception as e:
+        print('Could not apply scaling decision', e)
+
+def simulate_scaling(config, metrics_series, cluster_status='available', node_count=None):
+    """Simulate scaling
+    replays a series of simulated pipeline metrics through
+    decide_scaling without touching AWS, carrying the node count
+    and cluster status of each decision over to the next one.
+
+    Parameters:
+    config: configuration object
+    metrics_series: list of pipeline metrics, see get_pipeline_metrics
+    cluster_status: ClusterStatus to start from
+    node_count: number of nodes to start from, defaults to NODE_COUNT
+    Returns:
+    decisions: list of scaling decisions
+    """
+    if node_count is None:
+        node_count = config.getint('CLUSTER', 'NODE_COUNT')
+    decisions = []
+    for metrics in metrics_series:
+        decision = decide_scaling(config, metrics, cluster_status, node_count)
+        decisions.append(decision)
+        node_count = decision['target_nodes']
+        if decision['action'] == 'pause':
+            cluster_status = 'paused'
+        elif decision['action'] == 'resume':
+            cluster_status = 'available'
+        print(f"{decision['action']:>6} -> {node_count} nodes, "
+              f"{decision['hourly_cost']}/h: {decision['reason']}")
+    return decisions
+
+def autoscale_redshift_cluster(config, pending_runs=0, dry_run=False):
+    """autoscale redshift cluster
+
+    collects the pipeline metrics, decides the scaling action,
+    logs the decision and applies it unless dry_run is set
+
+    Parameters:
+    config: configuration object
+    pending_runs: DAG runs waiting to run, e.g. the size of a backfill
+    dry_run: only log the decision
+    Returns:
+    decision: scaling decision
+
+    """
+    redshift = boto3.client(
+        'redshift',
+        aws_access_key_id=config.get('AWS_ACCESS', 'AWS_ACCESS_KEY_ID'),
+        aws_secret_access_key=config.get('AWS_ACCESS', 'AWS_SECRET_ACCESS_KEY'),
+        region_name=config.get('AWS_ACCESS', 'AWS_REGION'), 
+    )
+    cluster_status = check_redshift_cluster_status(config, redshift)
+    if cluster_status is None:
+        print('Cluster does not exist, nothing to scale.')
+        return None
+
+    metrics = {'pending_runs': pending_runs, 'queue_depth': 0, 'max_stage_seconds': 0, 'idle_minutes': 0}
+    if cluster_status['ClusterStatus'] == 'available':
+        conn = connect_database()
+        metrics = get_pipeline_metrics(config, conn.cursor(), pending_runs)
+        conn.close()
+
+    decision = decide_scaling(
+        config, metrics, cluster_status['ClusterStatus'], cluster_status['NumberOfNodes']
+    )
+    log_scaling_decision(config, metrics, decision)
+    if not dry_run:
+        apply_scaling_decision(config, redshift, decision)
+    return decision
+
 def main(args):
     config = get_config()
     if args.launch:
         update_credentials_aws()
         iam_role = create_iam(config)
         ec2 = create_ec2(config)
+        create_bucket(config.get('S3', 'STAGING_BUCKET'), config)
         create_redshift_cluster(config, ec2, iam_role)
     
     if args.stop:
         remove_iam(config)
         delete_redshift_cluster(config)
+        delete_parameter_group(config)
+
+    if args.update_wlm:
+        redshift = boto3.client(
+            'redshift',
+            aws_access_key_id=config.get('AWS_ACCESS', 'AWS_ACCESS_KEY_ID'),
+            aws_secret_access_key=config.get('AWS_ACCESS', 'AWS_SECRET_ACCESS_KEY'),
+            region_name=config.get('AWS_ACCESS', 'AWS_REGION'), 
+        )
+        create_parameter_group(config, redshift)
+        print('Reboot the cluster for the WLM queues to take effect.')
+
+    if args.autoscale:
+        autoscale_redshift_cluster(config, args.pending_runs, args.dry_run)
+
+    if args.simulate:
+        with open(args.simulate, 'r') as metrics_file:
+            simulate_scaling(config, json.load(metrics_file))
     
     if args.create_table:
         conn = connect_database()
@@ -431,6 +780,11 @@ if __name__ == '__main__':
     parser = argparse.ArgumentParser(description="An action working with cluster")
     parser.add_argument('--launch', dest='launch', default=False, action='store_true', help="Launch Redshift cluster.")
     parser.add_argument('--stop', dest='stop', default=False, action='store_true', help='Stop and delete Redshift clluster.')
+    parser.add_argument('--update_wlm', dest='update_wlm', default=False, action='store_true', help='Apply WLM queues from dwh.cfg to the parameter group.')
+    parser.add_argument('--autoscale', dest='autoscale', default=False, action='store_true', help='Resize, pause or resume Redshift cluster from pipeline metrics.')
+    parser.add_argument('--pending_runs', dest='pending_runs', default=0, type=int, help='DAG runs waiting to run, e.g. the size of a backfill.')
+    parser.add_argument('--dry_run', dest='dry_run', default=False, action='store_true', help='Only log the scaling decision.')
+    parser.add_argument('--simulate', dest='simulate', default=None, help='Replay a JSON list of simulated pipeline metrics through the scaling policy.')
     parser.add_argument('--create_table', dest='create_table',default=False, action='store_true', help='Create and load data into table.')
     args = parser.parse_args()
     main(args=args)
\ No newline at end of file
@@ -1,7 +1,10 @@
 from datetime import datetime, timedelta
-from plugins.operators import (StageToRedshiftOperator, LoadFactOperator, 
-                               LoadDimensionOperator, DataQualityOperator)
-from plugins.helpers import SqlQueries, ConfigureDataAccess
+from plugins.operators import (StageToRedshiftOperator, TransformEventsOperator,
+                               ValidateJsonOperator, LoadFactOperator, 
+                               LoadDimensionOperator, DataQualityOperator,
+                               TableMaintenanceOperator, ExportOperator,
+                               ResumeClusterOperator)
+from plugins.helpers import SqlQueries, ConfigureDataAccess, StagingSchemas
 from airflow import DAG
 from airflow.operators.empty import EmptyOperator
 from airflow.operators.subdag import SubDagOperator
@@ -25,16 +28,53 @@ dag = DAG('sparkify_dag',
         )
 
 start_operator = EmptyOperator(task_id='Begin_execution', dag=dag)
+resume_cluster = ResumeClusterOperator(
+    task_id='Resume_cluster',
+    dag=dag,
+    aws_credentials_id=ConfigureDataAccess.AWS_CREDENTIALS_ID,
+    cluster_identifier=ConfigureDataAccess.CLUSTER_IDENTIFIER if ConfigureDataAccess.BACKEND == 'redshift' else '',
+    region=ConfigureDataAccess.REGION,
+    execution_timeout=timedelta(minutes=30)
+)
+transform_events = TransformEventsOperator(
+    task_id='Transform_events',
+    dag=dag,
+    aws_credentials_id=ConfigureDataAccess.AWS_CREDENTIALS_ID,
+    s3_bucket=ConfigureDataAccess.S3_BUCKET,
+    s3_key=ConfigureDataAccess.S3_LOG_KEY,
+    dest_s3_bucket=ConfigureDataAccess.S3_STAGING_BUCKET,
+    dest_s3_key=ConfigureDataAccess.S3_LOG_TRANSFORMED_KEY,
+    manifest_key=ConfigureDataAccess.S3_LOG_MANIFEST_KEY,
+    quarantine_key=ConfigureDataAccess.S3_QUARANTINE_KEY,
+    processes=ConfigureDataAccess.S3_PROCESSES
+)
+
+validate_songs = ValidateJsonOperator(
+    task_id='Validate_songs',
+    dag=dag,
+    aws_credentials_id=ConfigureDataAccess.AWS_CREDENTIALS_ID,
+    columns=StagingSchemas.staging_songs,
+    s3_bucket=ConfigureDataAccess.S3_BUCKET,
+    s3_key=ConfigureDataAccess.S3_SONG_KEY,
+    dest_s3_bucket=ConfigureDataAccess.S3_STAGING_BUCKET,
+    manifest_key=ConfigureDataAccess.S3_SONG_MANIFEST_KEY,
+    quarantine_key=ConfigureDataAccess.S3_QUARANTINE_KEY,
+    validated_key=ConfigureDataAccess.S3_VALIDATED_KEY,
+    processes=ConfigureDataAccess.S3_PROCESSES
+)
+
 stage_events_to_redshift = StageToRedshiftOperator(
     task_id='Stage_events',
     dag=dag,
     redshift_conn_id=ConfigureDataAccess.REDSHIFT_CONN_ID,
     aws_credentials_id=ConfigureDataAccess.AWS_CREDENTIALS_ID,
     table='staging_events',
-    s3_bucket=ConfigureDataAccess.S3_BUCKET,
-    s3_key=ConfigureDataAccess.S3_LOG_KEY,
+    s3_bucket=ConfigureDataAccess.S3_STAGING_BUCKET,
+    s3_key=ConfigureDataAccess.S3_LOG_MANIFEST_KEY,
     region=ConfigureDataAccess.REGION,
-    data_format=ConfigureDataAccess.DATA_FORMAT_EVENT
+    data_format=ConfigureDataAccess.DATA_FORMAT_EVENT,
+    use_manifest=True,
+    query_group=ConfigureDataAccess.QUERY_GROUP
 )
 
 stage_songs_to_redshift = StageToRedshiftOperator(
@@ -43,10 +83,12 @@ stage_songs_to_redshift = StageToRedshiftOperator(
     redshift_conn_id=ConfigureDataAccess.REDSHIFT_CONN_ID,
     aws_credentials_id=ConfigureDataAccess.AWS_CREDENTIALS_ID,
     table='staging_songs',
-    s3_bucket=ConfigureDataAccess.S3_BUCKET,
-    s3_key=ConfigureDataAccess.S3_SONG_KEY,
+    s3_bucket=ConfigureDataAccess.S3_STAGING_BUCKET,
+    s3_key=ConfigureDataAccess.S3_SONG_MANIFEST_KEY,
     region=ConfigureDataAccess.REGION,
-    data_format=ConfigureDataAccess.DATA_FORMAT_SONG
+    data_format=ConfigureDataAccess.DATA_FORMAT_SONG,
+    use_manifest=True,
+    query_group=ConfigureDataAccess.QUERY_GROUP
 )
 
 load_songplays_table = LoadFactOperator(
@@ -54,7 +96,8 @@ load_songplays_table = LoadFactOperator(
     dag=dag,
     table_name='songplays',
     postgres_conn_id=ConfigureDataAccess.REDSHIFT_CONN_ID,
-    sql_insert_stmt=SqlQueries.songplay_table_insert
+    sql_insert_stmt=SqlQueries.songplay_table_insert,
+    query_group=ConfigureDataAccess.QUERY_GROUP
 )
 
 load_user_dimension_table = LoadDimensionOperator(
@@ -63,7 +106,8 @@ load_user_dimension_table = LoadDimensionOperator(
     table_name='users',
     postgres_conn_id=ConfigureDataAccess.REDSHIFT_CONN_ID,
     insert_sql_stmt=SqlQueries.user_table_insert,
-    truncate=True
+    truncate=True,
+    query_group=ConfigureDataAccess.QUERY_GROUP
 )
 
 load_song_dimension_table = LoadDimensionOperator(
@@ -72,7 +116,8 @@ load_song_dimension_table = LoadDimensionOperator(
     table_name='songs',
     postgres_conn_id=ConfigureDataAccess.REDSHIFT_CONN_ID,
     insert_sql_stmt=SqlQueries.song_table_insert,
-    truncate=True
+    truncate=True,
+    query_group=ConfigureDataAccess.QUERY_GROUP
 )
 
 
@@ -82,7 +127,8 @@ load_artist_dimension_table = LoadDimensionOperator(
     table_name='artists',
     postgres_conn_id=ConfigureDataAccess.REDSHIFT_CONN_ID,
     insert_sql_stmt=SqlQueries.artist_table_insert,
-    truncate=True
+    truncate=True,
+    query_group=ConfigureDataAccess.QUERY_GROUP
 )
 
 load_time_dimension_table = LoadDimensionOperator(
@@ -91,7 +137,8 @@ load_time_dimension_table = LoadDimensionOperator(
     table_name='time',
     postgres_conn_id=ConfigureDataAccess.REDSHIFT_CONN_ID,
     insert_sql_stmt=SqlQueries.time_table_insert,
-    truncate=True
+    truncate=True,
+    query_group=ConfigureDataAccess.QUERY_GROUP
 )
 
 
@@ -99,6 +146,7 @@ run_quality_checks = DataQualityOperator(
     task_id='Run_data_quality_checks',
     dag=dag,
     redshift_conn_id=ConfigureDataAccess.REDSHIFT_CONN_ID,
+    query_group=ConfigureDataAccess.QUERY_GROUP,
     dq_checks_list=[
         { 'sql_testcase': 'SELECT COUNT(*) FROM public.users WHERE COALESCE(first_name, last_name, gender, level) IS NULL;', 'expected_result': 0 },
         { 'sql_testcase': 'SELECT COUNT(*) FROM public.songs WHERE COALESCE(title, artistid, year::text, duration::text) IS NULL;', 'expected_result': 0 },
@@ -107,12 +155,50 @@ run_quality_checks = DataQualityOperator(
     ]
 )
 
+run_table_maintenance = TableMaintenanceOperator(
+    task_id='Run_table_maintenance',
+    dag=dag,
+    postgres_conn_id=ConfigureDataAccess.REDSHIFT_CONN_ID,
+    tables=['songplays', 'users', 'songs', 'artists', 'time',
+            'staging_events', 'staging_songs'],
+    backend=ConfigureDataAccess.BACKEND,
+    time_budget=timedelta(minutes=10),
+    execution_timeout=timedelta(minutes=15),
+    retries=0,
+    query_group=ConfigureDataAccess.QUERY_GROUP
+)
+
+export_songplays = ExportOperator(
+    task_id='Export_songplays',
+    dag=dag,
+    redshift_conn_id=ConfigureDataAccess.REDSHIFT_CONN_ID,
+    aws_credentials_id=ConfigureDataAccess.AWS_CREDENTIALS_ID,
+    table='songplays',
+    columns="*, start_time::date AS start_date",
+    partition_by=['start_date'],
+    backend=ConfigureDataAccess.BACKEND,
+    data_format='parquet' if ConfigureDataAccess.BACKEND == 'redshift' else 'csv',
+    s3_bucket=ConfigureDataAccess.S3_STAGING_BUCKET,
+    s3_key=ConfigureDataAccess.S3_EXPORT_KEY,
+    region=ConfigureDataAccess.REGION,
+    local_path=ConfigureDataAccess.LOCAL_EXPORT_PATH,
+    watermark_column='start_time',
+    query_group=ConfigureDataAccess.QUERY_GROUP
+)
+
 end_operator = EmptyOperator(task_id='Stop_execution',  dag=dag)
 
-start_operator >> [stage_events_to_redshift, stage_songs_to_redshift]
+start_operator >> resume_cluster >> [transform_events, validate_songs]
+transform_events >> stage_events_to_redshift
+validate_songs >> stage_songs_to_redshift
 [stage_events_to_redshift, stage_songs_to_redshift] >> load_songplays_table
 load_songplays_table >> [load_user_dimension_table, 
                          load_song_dimension_table, 
                          load_artist_dimension_table,
                          load_time_dimension_table] >> run_quality_checks
-run_quality_checks >> end_operator
\ No newline at end of file
+# Maintenance is a leaf off the loads so it never holds up Stop_execution
+[load_user_dimension_table,
+ load_song_dimension_table,
+ load_artist_dimension_table,
+ load_time_dimension_table] >> run_table_maintenance
+run_quality_checks >> export_songplays >> end_operator
\ No newline at end of file
@@ -1,9 +1,13 @@
 from helpers.sql_queries import SqlQueries
 from helpers.configure_data_access import ConfigureDataAccess
+from helpers.query_group import tag_query_group
+from helpers.staging_schemas import StagingSchemas
 
 __all__ = [
     'SqlQueries',
     'ConfigureDataAccess',
+    'tag_query_group',
+    'StagingSchemas',
     'dimension_tables_work_list',
     'table_name_queries'
 ]
\ No newline at end of file
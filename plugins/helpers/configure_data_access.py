@@ -1,9 +1,38 @@
+import configparser
+import os
+
+# dwh.cfg sits next to the plugins folder, both locally and in the
+# airflow containers (read-only volume in docker-compose.yaml). Every
+# read has a fallback so the DAG still imports without the file.
+DWH_CONFIG_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(
+    os.path.abspath(__file__)))), 'dwh.cfg')
+dwh_config = configparser.ConfigParser()
+dwh_config.read(DWH_CONFIG_PATH)
+
 class ConfigureDataAccess():
     REGION = 'us-west-2'
     S3_BUCKET = 'udacity-dend'
     S3_LOG_KEY = 'log_data'
-    DATA_FORMAT_EVENT= f"JSON 's3://{S3_BUCKET}/log_json_path.json'"
+    # Created by `python cluster.py --launch` from the same dwh.cfg value
+    S3_STAGING_BUCKET = dwh_config.get('S3', 'STAGING_BUCKET', fallback='sparkify-staging')
+    # Per run, so overlapping backfill runs never clear each other's files
+    S3_LOG_TRANSFORMED_KEY = 'log_data_transformed/{ts_nodash}'
+    S3_LOG_MANIFEST_KEY = 'manifests/{ts_nodash}/staging_events.manifest'
+    S3_SONG_MANIFEST_KEY = 'manifests/{ts_nodash}/staging_songs.manifest'
+    S3_QUARANTINE_KEY = 'quarantine/{ts_nodash}'
+    S3_VALIDATED_KEY = 'validated/{ts_nodash}'
+    S3_EXPORT_KEY = 'export/songplays/{ts_nodash}'
+    # ./export on the host, see volumes in docker-compose.yaml
+    LOCAL_EXPORT_PATH = '/opt/airflow/export/songplays/{ts_nodash}'
+    DATA_FORMAT_EVENT= "JSON 'auto' TIMEFORMAT 'auto'"
     DATA_FORMAT_SONG= "JSON 'auto'"
     S3_SONG_KEY = 'song_data'
     AWS_CREDENTIALS_ID = 'aws_credentials'
-    REDSHIFT_CONN_ID = 'redshift'
\ No newline at end of file
+    REDSHIFT_CONN_ID = 'redshift'
+    BACKEND = 'redshift'
+    # Pool size for the S3 bound transform and validation stages
+    S3_PROCESSES = 16
+    CLUSTER_IDENTIFIER = dwh_config.get('CLUSTER', 'CLUSTER_IDENTIFIER', fallback='dwhCluster')
+    # Same query group cluster.py routes to the ETL WLM queue,
+    # plain Postgres has no query groups
+    QUERY_GROUP = dwh_config.get('WLM', 'ETL_QUERY_GROUP', fallback='etl') if BACKEND == 'redshift' else ''
\ No newline at end of file
@@ -0,0 +1,15 @@
+def tag_query_group(sql_stmt, query_group=""):
+    """Prefix statements with SET query_group so Redshift WLM
+    routes them to the queue matching the query group.
+
+    Args:
+        sql_stmt (str | list): statement(s) to run in one session
+        query_group (str, optional): WLM query group. Defaults to "",
+        which leaves the statements untouched (e.g. plain Postgres).
+    Returns:
+        list: statements to pass to PostgresHook.run
+    """
+    sql_list = [sql_stmt] if isinstance(sql_stmt, str) else list(sql_stmt)
+    if not query_group:
+        return sql_list
+    return [f"SET query_group TO '{query_group}';"] + sql_list
@@ -10,9 +10,7 @@ class SqlQueries:
                 events.sessionid, 
                 events.location, 
                 events.useragent
-                FROM (SELECT TIMESTAMP 'epoch' + ts/1000 * interval '1 second' AS start_time, *
-            FROM staging_events
-            WHERE page='NextSong') events
+            FROM staging_events events
             LEFT JOIN staging_songs songs
             ON events.song = songs.title
                 AND events.artist = songs.artist_name
@@ -22,7 +20,6 @@ class SqlQueries:
     user_table_insert = ("""
         SELECT distinct userid, firstname, lastname, gender, level
         FROM staging_events
-        WHERE page='NextSong'
     """)
 
     song_table_insert = ("""
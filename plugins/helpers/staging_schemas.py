@@ -0,0 +1,33 @@
+class StagingSchemas:
+    """Column types of the staging tables, as in create_tables.sql.
+
+    Each column maps to (type, size): the max byte length for
+    varchar, the precision for numeric and None otherwise.
+    """
+    staging_events = {
+        'artist': ('varchar', 256),
+        'firstname': ('varchar', 256),
+        'gender': ('varchar', 256),
+        'lastname': ('varchar', 256),
+        'length': ('numeric', 18),
+        'level': ('varchar', 256),
+        'location': ('varchar', 256),
+        'sessionid': ('int4', None),
+        'song': ('varchar', 256),
+        'start_time': ('timestamp', None),
+        'useragent': ('varchar', 256),
+        'userid': ('int4', None)
+    }
+
+    staging_songs = {
+        'num_songs': ('int4', None),
+        'artist_id': ('varchar', 256),
+        'artist_name': ('varchar', 256),
+        'artist_latitude': ('numeric', 18),
+        'artist_longitude': ('numeric', 18),
+        'artist_location': ('varchar', 256),
+        'song_id': ('varchar', 256),
+        'title': ('varchar', 256),
+        'duration': ('numeric', 18),
+        'year': ('int4', None)
+    }
@@ -1,11 +1,21 @@
 from operators.stage_redshift import StageToRedshiftOperator
+from operators.transform_events import TransformEventsOperator
+from operators.validate_json import ValidateJsonOperator
 from operators.load_fact import LoadFactOperator
 from operators.load_dimension import LoadDimensionOperator
 from operators.data_quality import DataQualityOperator
+from operators.table_maintenance import TableMaintenanceOperator
+from operators.export import ExportOperator
+from operators.resume_cluster import ResumeClusterOperator
 
 __all__ = [
     'StageToRedshiftOperator',
+    'TransformEventsOperator',
+    'ValidateJsonOperator',
     'LoadFactOperator',
     'LoadDimensionOperator',
-    'DataQualityOperator'
+    'DataQualityOperator',
+    'TableMaintenanceOperator',
+    'ExportOperator',
+    'ResumeClusterOperator'
 ]   
\ No newline at end of file
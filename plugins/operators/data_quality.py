@@ -1,7 +1,9 @@
 import logging
 from airflow.providers.postgres.hooks.postgres import PostgresHook
+from airflow.providers.common.sql.hooks.sql import fetch_all_handler
 from airflow.models import BaseOperator
 from airflow.utils.decorators import apply_defaults
+from helpers.query_group import tag_query_group
 
 class DataQualityOperator(BaseOperator):
     
@@ -11,10 +13,12 @@ class DataQualityOperator(BaseOperator):
     def __init__(self,
                  redshift_conn_id="",
                  dq_checks_list = [],
+                 query_group="",
                  *args, **kwargs):
         super(DataQualityOperator, self).__init__(*args, **kwargs)
         self.redshift_conn_id = redshift_conn_id
         self.dq_checks_list = dq_checks_list
+        self.query_group = query_group
     
     def execute(self, context):
         if not self.dq_checks_list:
@@ -30,7 +34,8 @@ class DataQualityOperator(BaseOperator):
                 
                 try:
                     self.log.info(f"Running testcase #{testcase_number}")
-                    records = redshift.get_records(testcase)
+                    records = redshift.run(tag_query_group(testcase, self.query_group),
+                                           handler=fetch_all_handler)
                     if not exected_output == records[0][0]:
                         error_found += 1
                         raise ValueError(f"Data quality run testcase #{testcase_number} failed. \
@@ -0,0 +1,212 @@
+import gzip
+import json
+import os
+from airflow.providers.postgres.hooks.postgres import PostgresHook
+from airflow.models import BaseOperator, Variable
+from airflow.providers.amazon.aws.hooks.base_aws import AwsGenericHook
+from airflow.utils.decorators import apply_defaults
+from helpers.query_group import tag_query_group
+
+class ChunkedGzipWriter:
+    """File-like sink for COPY TO STDOUT that rotates gzip files
+    once a chunk reaches chunk_size compressed bytes.
+
+    psycopg2 calls write() once per COPY row, so rotating between
+    writes never splits a row across files. content_length in the
+    entries is the size of the gzip file, as in Redshift manifests.
+    """
+
+    def __init__(self, directory, prefix, chunk_size, header=None):
+        self.directory = directory
+        self.prefix = prefix
+        self.chunk_size = chunk_size
+        self.header = header
+        self.entries = []
+        self.raw_file = None
+        self.file = None
+
+    def _open_chunk(self):
+        path = os.path.join(self.directory, f"{self.prefix}_part_{len(self.entries):04d}.csv.gz")
+        self.raw_file = open(path, 'wb')
+        self.file = gzip.GzipFile(fileobj=self.raw_file, mode='wb')
+        self.entries.append({'url': path, 'meta': {'content_length': 0, 'record_count': 0}})
+        if self.header:
+            self.file.write(self.header.encode('utf-8'))
+
+    def write(self, data):
+        if isinstance(data, str):
+            data = data.encode('utf-8')
+        # raw_file.tell() lags the compressor buffer a little, close enough to rotate on
+        if self.file is None or self.raw_file.tell() >= self.chunk_size:
+            self.close()
+            self._open_chunk()
+        self.file.write(data)
+        self.entries[-1]['meta']['record_count'] += 1
+
+    def close(self):
+        if self.file is not None:
+            self.file.close()
+            self.raw_file.close()
+            self.entries[-1]['meta']['content_length'] = os.path.getsize(self.entries[-1]['url'])
+            self.file = None
+            self.raw_file = None
+
+class ExportOperator(BaseOperator):
+    """Export a table for downstream consumers without pulling
+    the rows through the leader node.
+
+    On Redshift it runs a parallel UNLOAD to compressed, partitioned
+    Parquet or CSV in S3 with a manifest. On plain Postgres
+    (backend="postgres") it streams COPY TO STDOUT into chunked gzip
+    CSV files in local_path and writes a manifest next to them.
+    partition_by only applies to UNLOAD, partition on a derived
+    column (e.g. a date) rather than a raw timestamp, which would
+    give one partition per row. With watermark_column set, only
+    rows newer than the last exported watermark (kept in an Airflow
+    Variable) are exported.
+    """
+
+    ui_color = '#E5A55D'
+    template_fields = ("s3_key", "local_path")
+    unload_sql_stmt = """
+        UNLOAD ('{}')
+        TO '{}'
+        ACCESS_KEY_ID '{}'
+        SECRET_ACCESS_KEY '{}'
+        {}
+        PARALLEL ON
+        MANIFEST VERBOSE
+        MAXFILESIZE {} MB
+        ALLOWOVERWRITE
+        REGION '{}'
+    """
+    data_formats = {
+        'parquet': "FORMAT AS PARQUET",
+        'csv': "FORMAT AS CSV HEADER GZIP"
+    }
+
+    @apply_defaults
+    def __init__(self,
+                 redshift_conn_id="",
+                 aws_credentials_id="",
+                 table="",
+                 columns="*",
+                 backend="redshift",
+                 data_format="parquet",
+                 partition_by=[],
+                 s3_bucket="",
+                 s3_key="",
+                 region="",
+                 local_path="",
+                 watermark_column="",
+                 max_file_size_mb=256,
+                 query_group="",
+                 *args, **kwargs):
+        super(ExportOperator, self).__init__(*args, **kwargs)
+        if backend not in ('redshift', 'postgres'):
+            raise ValueError(f"Unsupported backend '{backend}', expected 'redshift' or 'postgres'")
+        if data_format not in self.data_formats:
+            raise ValueError(f"Unsupported data format '{data_format}', \
+                expected one of {list(self.data_formats)}")
+        if backend == 'postgres' and data_format != 'csv':
+            raise ValueError("Postgres export only supports the 'csv' data format")
+        self.redshift_conn_id = redshift_conn_id
+        self.aws_credentials_id = aws_credentials_id
+        self.table = table
+        self.columns = columns
+        self.backend = backend
+        self.data_format = data_format
+        self.partition_by = partition_by
+        self.s3_bucket = s3_bucket
+        self.s3_key = s3_key
+        self.region = region
+        self.local_path = local_path
+        self.watermark_column = watermark_column
+        self.max_file_size_mb = max_file_size_mb
+        self.query_group = query_group
+
+    @property
+    def watermark_variable(self):
+        return f"export_watermark_{self.table}"
+
+    def build_query(self, low_watermark, high_watermark):
+        """Build the export SELECT, restricted to the watermark window
+        when exporting incrementally.
+        """
+        query = f"SELECT {self.columns} FROM {self.table}"
+        if self.watermark_column:
+            conditions = [f"{self.watermark_column} <= '{high_watermark}'"]
+            if low_watermark:
+                conditions.insert(0, f"{self.watermark_column} > '{low_watermark}'")
+            query += " WHERE " + " AND ".join(conditions)
+        return query
+
+    def unload_to_s3(self, postgres, query, context):
+        aws_hook = AwsGenericHook(self.aws_credentials_id)
+        credentials = aws_hook.get_credentials()
+        rendered_key = self.s3_key.format(**context).rstrip('/')
+        s3_path = f"s3://{self.s3_bucket}/{rendered_key}/"
+        data_format = self.data_formats[self.data_format]
+        if self.partition_by:
+            data_format += f" PARTITION BY ({', '.join(self.partition_by)})"
+        formatted_sql = ExportOperator.unload_sql_stmt.format(
+            query.replace("'", "''"),
+            s3_path,
+            credentials.access_key,
+            credentials.secret_key,
+            data_format,
+            self.max_file_size_mb,
+            self.region
+        )
+        self.log.info(f"Unload {self.table} to {s3_path}")
+        postgres.run(tag_query_group(formatted_sql, self.query_group))
+        return f"{s3_path}manifest"
+
+    def copy_to_local(self, postgres, query, context):
+        rendered_path = self.local_path.format(**context)
+        os.makedirs(rendered_path, exist_ok=True)
+        conn = postgres.get_conn()
+        try:
+            with conn.cursor() as cur:
+                cur.execute(f"SELECT {self.columns} FROM {self.table} LIMIT 0")
+                header = ",".join(desc[0] for desc in cur.description) + "\n"
+                writer = ChunkedGzipWriter(
+                    rendered_path, self.table, self.max_file_size_mb * 1024 * 1024, header
+                )
+                try:
+                    cur.copy_expert(f"COPY ({query}) TO STDOUT WITH (FORMAT csv)", writer)
+                finally:
+                    writer.close()
+        finally:
+            conn.close()
+
+        manifest_path = os.path.join(rendered_path, "manifest")
+        with open(manifest_path, 'w') as manifest:
+            json.dump({'entries': writer.entries}, manifest, indent=2)
+        self.log.info(f"Copied {self.table} into {len(writer.entries)} files in {rendered_path}")
+        return manifest_path
+
+    def execute(self, context):
+        postgres = PostgresHook(postgres_conn_id=self.redshift_conn_id)
+
+        low_watermark = high_watermark = None
+        if self.watermark_column:
+            low_watermark = Variable.get(self.watermark_variable, default_var=None)
+            high_watermark = postgres.get_records(
+                f"SELECT MAX({self.watermark_column}) FROM {self.table}"
+            )[0][0]
+            if high_watermark is None or str(high_watermark) == low_watermark:
+                self.log.info(f"No new rows in {self.table} since watermark {low_watermark}")
+                return None
+
+        query = self.build_query(low_watermark, high_watermark)
+        self.log.info(f"Export {self.table} with '{query}'")
+        if self.backend == 'redshift':
+            manifest = self.unload_to_s3(postgres, query, context)
+        else:
+            manifest = self.copy_to_local(postgres, query, context)
+
+        if self.watermark_column:
+            Variable.set(self.watermark_variable, str(high_watermark))
+            self.log.info(f"Export watermark of {self.table} moved to {high_watermark}")
+        return manifest
@@ -2,6 +2,7 @@ from airflow.providers.postgres.hooks.postgres import PostgresHook
 from airflow.models import BaseOperator
 from airflow.providers.amazon.aws.hooks.base_aws import AwsGenericHook
 from airflow.utils.decorators import apply_defaults
+from helpers.query_group import tag_query_group
 
 class LoadDimensionOperator(BaseOperator):
 
@@ -13,6 +14,7 @@ class LoadDimensionOperator(BaseOperator):
                  insert_sql_stmt="",
                  table_name="",
                  truncate=False,
+                 query_group="",
                  *args, **kwargs):
 
         super(LoadDimensionOperator, self).__init__(*args, **kwargs)
@@ -20,12 +22,13 @@ class LoadDimensionOperator(BaseOperator):
         self.insert_sql_stmt = insert_sql_stmt
         self.table_name = table_name
         self.truncate = truncate
+        self.query_group = query_group
 
     def execute(self, context):
         postgres = PostgresHook(postgres_conn_id=self.postgres_conn_id)
         if self.truncate:
             self.log.info(f"Truncate dimension table {self.table_name}")
-            postgres.run(f"TRUNCATE TABLE {self.table_name};")
+            postgres.run(tag_query_group(f"TRUNCATE TABLE {self.table_name};", self.query_group))
             
         self.log.info(f"Load data to dimension table {self.table_name}")
-        postgres.run(f"INSERT INTO {self.table_name} {self.insert_sql_stmt};")
\ No newline at end of file
+        postgres.run(tag_query_group(f"INSERT INTO {self.table_name} {self.insert_sql_stmt};", self.query_group))
\ No newline at end of file
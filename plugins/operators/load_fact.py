@@ -1,6 +1,7 @@
 from airflow.providers.postgres.hooks.postgres import PostgresHook
 from airflow.models import BaseOperator
 from airflow.utils.decorators import apply_defaults
+from helpers.query_group import tag_query_group
 
 class LoadFactOperator(BaseOperator):
     
@@ -11,14 +12,16 @@ class LoadFactOperator(BaseOperator):
                  postgres_conn_id="",
                  sql_insert_stmt="",
                  table_name="", 
+                 query_group="",
                  *args, **kwargs):
 
         super(LoadFactOperator, self).__init__(*args, **kwargs)
         self.postgres_conn_id = postgres_conn_id
         self.sql_insert_stmt = sql_insert_stmt
         self.table_name = table_name
+        self.query_group = query_group
         
     def execute(self, context):
         postgres = PostgresHook(postgres_conn_id=self.postgres_conn_id)
         self.log.info(f"Load data to fact table {self.table_name}")
-        postgres.run(f"INSERT INTO {self.table_name} {self.sql_insert_stmt}")
\ No newline at end of file
+        postgres.run(tag_query_group(f"INSERT INTO {self.table_name} {self.sql_insert_stmt}", self.query_group))
\ No newline at end of file
@@ -0,0 +1,59 @@
+import time
+from airflow.exceptions import AirflowFailException
+from airflow.models import BaseOperator
+from airflow.providers.amazon.aws.hooks.base_aws import AwsGenericHook
+from airflow.utils.decorators import apply_defaults
+
+class ResumeClusterOperator(BaseOperator):
+    """Make sure the Redshift cluster is available before staging.
+
+    `python cluster.py --autoscale` pauses the cluster after idle
+    windows, so each run resumes it when paused and waits until it
+    is available. Any state that will not turn into available on its
+    own (deleting, final-snapshot, hardware-failure, ...) fails the
+    task without retries. An empty cluster_identifier (plain Postgres)
+    skips the check.
+    """
+
+    ui_color = '#A3C1AD'
+    waiting_states = ('pausing', 'resuming', 'creating', 'modifying', 'rebooting',
+                      'renaming', 'resizing', 'available, prep-for-resize',
+                      'available, resize-cleanup')
+
+    @apply_defaults
+    def __init__(self,
+                 aws_credentials_id="",
+                 cluster_identifier="",
+                 region="",
+                 poke_interval=30,
+                 *args, **kwargs):
+        super(ResumeClusterOperator, self).__init__(*args, **kwargs)
+        self.aws_credentials_id = aws_credentials_id
+        self.cluster_identifier = cluster_identifier
+        self.region = region
+        self.poke_interval = poke_interval
+
+    def execute(self, context):
+        if not self.cluster_identifier:
+            self.log.info("No Redshift cluster to resume.")
+            return
+        redshift = AwsGenericHook(
+            self.aws_credentials_id, client_type='redshift', region_name=self.region
+        ).get_conn()
+        while True:
+            cluster_status = redshift.describe_clusters(
+                ClusterIdentifier=self.cluster_identifier
+            )['Clusters'][0]['ClusterStatus']
+            if cluster_status == 'available':
+                self.log.info(f"Cluster {self.cluster_identifier} is available.")
+                return
+            if cluster_status == 'paused':
+                self.log.info(f"Resuming paused cluster {self.cluster_identifier}")
+                redshift.resume_cluster(ClusterIdentifier=self.cluster_identifier)
+            elif cluster_status in self.waiting_states:
+                self.log.info(f"Cluster {self.cluster_identifier} is {cluster_status}, waiting.")
+            else:
+                raise AirflowFailException(
+                    f"Cluster {self.cluster_identifier} is {cluster_status}, it will not become available."
+                )
+            time.sleep(self.poke_interval)
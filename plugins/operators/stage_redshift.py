@@ -1,7 +1,9 @@
+import time
 from airflow.providers.postgres.hooks.postgres import PostgresHook
 from airflow.models import BaseOperator
 from airflow.providers.amazon.aws.hooks.base_aws import AwsGenericHook
 from airflow.utils.decorators import apply_defaults
+from helpers.query_group import tag_query_group
 
 class StageToRedshiftOperator(BaseOperator):
     ui_color = '#358140'
@@ -24,6 +26,8 @@ class StageToRedshiftOperator(BaseOperator):
                  s3_key="",
                  region="",
                  data_format="",
+                 query_group="",
+                 use_manifest=False,
                  *args, **kwargs):
         super(StageToRedshiftOperator, self).__init__(*args, **kwargs)
         self.redshift_conn_id = redshift_conn_id
@@ -33,6 +37,8 @@ class StageToRedshiftOperator(BaseOperator):
         self.s3_key = s3_key
         self.region = region
         self.data_format = data_format
+        self.query_group = query_group
+        self.use_manifest = use_manifest
     
     def execute(self, context):
         aws_hook = AwsGenericHook(self.aws_credentials_id)
@@ -40,7 +46,7 @@ class StageToRedshiftOperator(BaseOperator):
         redshift = PostgresHook(postgres_conn_id=self.redshift_conn_id)
         
         self.log.info("Clearing data from destination Redshift table")
-        redshift.run("DELETE FROM {}".format(self.table))
+        redshift.run(tag_query_group("DELETE FROM {}".format(self.table), self.query_group))
         
         self.log.info("Copying data from S3 to Redshift")
         rendered_key = self.s3_key.format(**context)
@@ -50,9 +56,11 @@ class StageToRedshiftOperator(BaseOperator):
             s3_path,
             credentials.access_key,
             credentials.secret_key,
-            self.data_format,
+            self.data_format + (" MANIFEST" if self.use_manifest else ""),
             self.region
         )
         self.log.info(f"Copy data from {s3_path} to {self.table} table.")
-        redshift.run(formatted_sql)
+        started = time.monotonic()
+        redshift.run(tag_query_group(formatted_sql, self.query_group))
+        self.log.info(f"Copied {s3_path} to {self.table} in {time.monotonic() - started:.2f}s")
  
\ No newline at end of file
@@ -0,0 +1,133 @@
+import time
+from datetime import timedelta
+from airflow.providers.postgres.hooks.postgres import PostgresHook
+from airflow.models import BaseOperator
+from airflow.utils.decorators import apply_defaults
+from helpers.query_group import tag_query_group
+
+class TableMaintenanceOperator(BaseOperator):
+    """Vacuum and analyze only the tables whose health is past
+    the thresholds, within a fixed time budget.
+
+    Health is read from SVV_TABLE_INFO on Redshift and from
+    pg_stat_user_tables on plain Postgres (backend="postgres"),
+    as (table, unsorted %, stats off %, deleted rows %).
+    """
+
+    ui_color = '#C8A2C8'
+    health_sql_stmt = {
+        'redshift': """
+            SELECT "table",
+                   COALESCE(unsorted, 0),
+                   COALESCE(stats_off, 0),
+                   CASE WHEN tbl_rows > 0
+                        THEN (tbl_rows - estimated_visible_rows) * 100.0 / tbl_rows
+                        ELSE 0 END
+            FROM svv_table_info
+            WHERE "schema" = '{}' AND "table" IN ({})
+        """,
+        'postgres': """
+            SELECT relname,
+                   0,
+                   n_mod_since_analyze * 100.0 / GREATEST(n_live_tup, 1),
+                   n_dead_tup * 100.0 / GREATEST(n_live_tup + n_dead_tup, 1)
+            FROM pg_stat_user_tables
+            WHERE schemaname = '{}' AND relname IN ({})
+        """
+    }
+    maintenance_sql_stmt = {
+        'redshift': {
+            'sort': 'VACUUM SORT ONLY {};',
+            'delete': 'VACUUM DELETE ONLY {};',
+            'analyze': 'ANALYZE {} PREDICATE COLUMNS;'
+        },
+        'postgres': {
+            'delete': 'VACUUM {};',
+            'analyze': 'ANALYZE {};'
+        }
+    }
+
+    @apply_defaults
+    def __init__(self,
+                 postgres_conn_id="",
+                 tables=[],
+                 schema="public",
+                 backend="redshift",
+                 unsorted_pct_threshold=10,
+                 stats_off_pct_threshold=10,
+                 deleted_pct_threshold=5,
+                 time_budget=timedelta(minutes=10),
+                 query_group="",
+                 *args, **kwargs):
+
+        super(TableMaintenanceOperator, self).__init__(*args, **kwargs)
+        if backend not in self.health_sql_stmt:
+            raise ValueError(f"Unsupported backend '{backend}', \
+                expected one of {list(self.health_sql_stmt)}")
+        self.postgres_conn_id = postgres_conn_id
+        self.tables = tables
+        self.schema = schema
+        self.backend = backend
+        self.unsorted_pct_threshold = unsorted_pct_threshold
+        self.stats_off_pct_threshold = stats_off_pct_threshold
+        self.deleted_pct_threshold = deleted_pct_threshold
+        self.time_budget = time_budget
+        self.query_group = query_group
+
+    def plan_maintenance(self, health_records):
+        """Turn health records into the statements to run, in order.
+
+        Args:
+            health_records (list): rows of (table, unsorted %, stats off %, deleted %)
+        Returns:
+            list: (table, statement) tuples
+        """
+        statements = self.maintenance_sql_stmt[self.backend]
+        plan = []
+        for table, unsorted, stats_off, deleted in health_records:
+            quoted_table = f'{self.schema}."{table}"'
+            if 'sort' in statements and float(unsorted) > self.unsorted_pct_threshold:
+                plan.append((table, statements['sort'].format(quoted_table)))
+            if float(deleted) > self.deleted_pct_threshold:
+                plan.append((table, statements['delete'].format(quoted_table)))
+            if float(stats_off) > self.stats_off_pct_threshold:
+                plan.append((table, statements['analyze'].format(quoted_table)))
+        return plan
+
+    def execute(self, context):
+        if not self.tables:
+            self.log.info("Empty table list for maintenance, nothing to do.")
+            return
+
+        postgres = PostgresHook(postgres_conn_id=self.postgres_conn_id)
+        table_list = ", ".join(f"'{table}'" for table in self.tables)
+        health_records = postgres.get_records(
+            self.health_sql_stmt[self.backend].format(self.schema, table_list)
+        )
+        for table, unsorted, stats_off, deleted in health_records:
+            self.log.info(f"Table {table}: unsorted {float(unsorted):.1f}%, "
+                          f"stats off {float(stats_off):.1f}%, deleted {float(deleted):.1f}%")
+
+        plan = self.plan_maintenance(health_records)
+        if not plan:
+            self.log.info("All tables are within thresholds, skip maintenance.")
+            return
+
+        started = time.monotonic()
+        budget = self.time_budget.total_seconds()
+        for table, statement in plan:
+            remaining = budget - (time.monotonic() - started)
+            if remaining <= 0:
+                self.log.info(f"Time budget of {budget:.0f}s used up, skip the rest of maintenance.")
+                break
+            self.log.info(f"Running '{statement}' on {table}")
+            # VACUUM cannot run inside a transaction block, and the statement
+            # timeout keeps a single long vacuum inside the remaining budget.
+            sql_list = tag_query_group(
+                [f"SET statement_timeout TO {int(remaining * 1000)};", statement],
+                self.query_group
+            )
+            try:
+                postgres.run(sql_list, autocommit=True)
+            except Exception as e:
+                self.log.warning(f"Maintenance on {table} cannot finish because '{e}'!")
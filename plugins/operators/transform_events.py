@@ -0,0 +1,204 @@
+import json
+import time
+from datetime import datetime, timezone
+from multiprocessing import Pool
+from airflow.providers.amazon.aws.hooks.s3 import S3Hook
+from airflow.models import BaseOperator
+from airflow.utils.decorators import apply_defaults
+from helpers.staging_schemas import StagingSchemas
+from operators.validate_json import DEFAULT_PROCESSES, iter_json_objects, validate_record
+
+# staging_events column -> raw log field
+PROJECTION = {
+    'artist': 'artist',
+    'firstname': 'firstName',
+    'gender': 'gender',
+    'lastname': 'lastName',
+    'length': 'length',
+    'level': 'level',
+    'location': 'location',
+    'sessionid': 'sessionId',
+    'song': 'song',
+    'useragent': 'userAgent',
+    'userid': 'userId'
+}
+
+def transform_event(event, page):
+    """Return the slim staging_events record for a raw event,
+    or None when the event is filtered out.
+
+    Raises ValueError when a kept event cannot be transformed.
+    """
+    if not isinstance(event, dict):
+        raise ValueError("expected JSON object")
+    if event.get('page') != page:
+        return None
+    record = {column: event.get(field) for column, field in PROJECTION.items()}
+    if record['userid'] in ("", None):
+        return None
+    try:
+        record['userid'] = int(record['userid'])
+    except (TypeError, ValueError):
+        raise ValueError(f"userId: expected integer, got {record['userid']!r}")
+    ts = event.get('ts')
+    if isinstance(ts, bool) or not isinstance(ts, int):
+        raise ValueError(f"ts: expected integer, got {ts!r}")
+    # Whole seconds, like TIMESTAMP 'epoch' + ts/1000 * interval '1 second'
+    # on the int8 ts, so play ids and the time dimension keep their grain
+    record['start_time'] = datetime.fromtimestamp(
+        ts // 1000, tz=timezone.utc
+    ).strftime('%Y-%m-%d %H:%M:%S')
+    return record
+
+def transform_lines(content, page):
+    """Transform the JSON objects of one log file.
+
+    Lines that are not valid JSON, cannot be transformed or do not
+    fit the staging_events columns are returned for quarantine.
+
+    Returns:
+        tuple: (transformed lines, quarantined records, input rows)
+    """
+    rows_in = 0
+    records, bad_records = [], []
+    for line, event, error in iter_json_objects(content):
+        rows_in += 1
+        if error:
+            bad_records.append({'line': line, 'errors': [error]})
+            continue
+        try:
+            record = transform_event(event, page)
+        except ValueError as e:
+            bad_records.append({'line': line, 'errors': [str(e)]})
+            continue
+        if record is None:
+            continue
+        errors = validate_record(record, StagingSchemas.staging_events)
+        if errors:
+            bad_records.append({'line': line, 'errors': errors})
+        else:
+            records.append(json.dumps(record))
+    return records, bad_records, rows_in
+
+_s3 = None
+
+def _init_worker(aws_credentials_id):
+    global _s3
+    _s3 = S3Hook(aws_conn_id=aws_credentials_id)
+
+def _transform_file(args):
+    """Transform one log file in a pool worker and upload the result.
+
+    Returns:
+        dict: key, uploaded dest_key (None when nothing was kept),
+        quarantined records and volume counters
+    """
+    bucket, key, source_prefix, dest_bucket, dest_prefix, page = args
+    content = _s3.read_key(key, bucket_name=bucket)
+    records, bad_records, rows_in = transform_lines(content, page)
+    result = {
+        'key': key, 'dest_key': None, 'bad_records': bad_records,
+        'rows_in': rows_in, 'rows_out': len(records),
+        'bytes_in': len(content.encode('utf-8')), 'bytes_out': 0
+    }
+    if records:
+        transformed = "\n".join(records)
+        # Keep the path below the source prefix so same-named files in
+        # different folders do not overwrite each other
+        result['dest_key'] = f"{dest_prefix}/{key[len(source_prefix):].lstrip('/')}"
+        result['bytes_out'] = len(transformed.encode('utf-8'))
+        _s3.load_string(transformed, key=result['dest_key'], bucket_name=dest_bucket, replace=True)
+    return result
+
+class TransformEventsOperator(BaseOperator):
+    """Filter, project and validate raw log events before they are
+    copied into staging_events.
+
+    Only NextSong events are kept, only the columns used by the
+    songplays and users inserts are written, and start_time is
+    computed once from ts. Raw lines that are malformed or do not
+    fit the staging_events columns are moved to the quarantine
+    prefix instead of failing the task. Files are transformed in a
+    multiprocessing pool, each into one JSON lines file under the
+    destination prefix, and a COPY manifest of those files is
+    written to manifest_key. Volume and timings are logged and
+    returned to XCom.
+    """
+
+    ui_color = '#4A8FB7'
+    template_fields = ("s3_key", "dest_s3_key", "manifest_key", "quarantine_key")
+
+    @apply_defaults
+    def __init__(self,
+                 aws_credentials_id="",
+                 s3_bucket="",
+                 s3_key="",
+                 dest_s3_bucket="",
+                 dest_s3_key="",
+                 manifest_key="",
+                 quarantine_key="",
+                 page="NextSong",
+                 processes=None,
+                 *args, **kwargs):
+        super(TransformEventsOperator, self).__init__(*args, **kwargs)
+        self.aws_credentials_id = aws_credentials_id
+        self.s3_bucket = s3_bucket
+        self.s3_key = s3_key
+        self.dest_s3_bucket = dest_s3_bucket
+        self.dest_s3_key = dest_s3_key
+        self.manifest_key = manifest_key
+        self.quarantine_key = quarantine_key
+        self.page = page
+        self.processes = processes or DEFAULT_PROCESSES
+
+    def execute(self, context):
+        s3 = S3Hook(aws_conn_id=self.aws_credentials_id)
+        rendered_key = self.s3_key.format(**context)
+        rendered_dest_key = self.dest_s3_key.format(**context).rstrip('/')
+        rendered_manifest_key = self.manifest_key.format(**context)
+        rendered_quarantine_key = self.quarantine_key.format(**context).rstrip('/')
+
+        self.log.info(f"Clearing s3://{self.dest_s3_bucket}/{rendered_dest_key}")
+        old_keys = s3.list_keys(bucket_name=self.dest_s3_bucket, prefix=rendered_dest_key + '/')
+        if old_keys:
+            s3.delete_objects(bucket=self.dest_s3_bucket, keys=old_keys)
+
+        keys = [key for key in s3.list_keys(bucket_name=self.s3_bucket, prefix=rendered_key) or []
+                if key.endswith('.json')]
+        started = time.monotonic()
+        stats = {'files': len(keys), 'rows_in': 0, 'rows_out': 0, 'bytes_in': 0, 'bytes_out': 0,
+                 'quarantined_records': 0}
+        entries = []
+        with Pool(self.processes, initializer=_init_worker, initargs=(self.aws_credentials_id,)) as pool:
+            tasks = [(self.s3_bucket, key, rendered_key, self.dest_s3_bucket, rendered_dest_key, self.page)
+                     for key in keys]
+            for result in pool.imap_unordered(_transform_file, tasks, chunksize=4):
+                for counter in ('rows_in', 'rows_out', 'bytes_in', 'bytes_out'):
+                    stats[counter] += result[counter]
+                if result['dest_key']:
+                    entries.append({'url': f"s3://{self.dest_s3_bucket}/{result['dest_key']}",
+                                    'mandatory': True})
+                if result['bad_records']:
+                    stats['quarantined_records'] += len(result['bad_records'])
+                    s3.load_string(
+                        "\n".join(json.dumps(record) for record in result['bad_records']),
+                        key=f"{rendered_quarantine_key}/{result['key']}",
+                        bucket_name=self.dest_s3_bucket,
+                        replace=True
+                    )
+                    self.log.info(f"Quarantined {len(result['bad_records'])} records of "
+                                  f"{result['key']}: {result['bad_records'][0]['errors']}")
+
+        s3.load_string(json.dumps({'entries': entries}), key=rendered_manifest_key,
+                       bucket_name=self.dest_s3_bucket, replace=True)
+
+        stats['seconds'] = round(time.monotonic() - started, 2)
+        stats['row_reduction_pct'] = round(
+            100.0 * (1 - stats['rows_out'] / stats['rows_in']), 1) if stats['rows_in'] else 0.0
+        stats['byte_reduction_pct'] = round(
+            100.0 * (1 - stats['bytes_out'] / stats['bytes_in']), 1) if stats['bytes_in'] else 0.0
+        self.log.info(f"Transformed {stats['files']} files in {stats['seconds']}s: "
+                      f"rows {stats['rows_in']} -> {stats['rows_out']} (-{stats['row_reduction_pct']}%), "
+                      f"bytes {stats['bytes_in']} -> {stats['bytes_out']} (-{stats['byte_reduction_pct']}%), "
+                      f"quarantined {stats['quarantined_records']} records")
+        return stats
@@ -0,0 +1,183 @@
+import json
+import re
+import time
+from datetime import datetime
+from multiprocessing import Pool
+from airflow.providers.amazon.aws.hooks.s3 import S3Hook
+from airflow.models import BaseOperator
+from airflow.utils.decorators import apply_defaults
+
+WHITESPACE = re.compile(r'\s*')
+# Workers mostly wait on S3 reads, so the pool is sized for I/O, not CPUs
+DEFAULT_PROCESSES = 16
+
+INT_RANGES = {
+    'int4': (-2**31, 2**31 - 1),
+    'int8': (-2**63, 2**63 - 1)
+}
+
+def iter_json_objects(content):
+    """Yield (text, object, error) for each JSON object in content.
+
+    Objects may span several lines or share one, like COPY with
+    JSON 'auto' accepts. After a parse error the text up to the end
+    of that line is reported and parsing resumes on the next line.
+    """
+    decoder = json.JSONDecoder()
+    pos = WHITESPACE.match(content, 0).end()
+    while pos < len(content):
+        try:
+            obj, end = decoder.raw_decode(content, pos)
+            yield content[pos:end], obj, None
+        except ValueError as e:
+            end = content.find('\n', pos)
+            end = len(content) if end == -1 else end
+            yield content[pos:end], None, f"invalid JSON: {e}"
+        pos = WHITESPACE.match(content, end).end()
+
+def validate_value(value, column_type, size):
+    """Return an error message when value does not fit the column,
+    None otherwise. Nulls always fit.
+    """
+    if value is None:
+        return None
+    if column_type == 'varchar':
+        if not isinstance(value, str):
+            return f"expected string, got {type(value).__name__}"
+        if len(value.encode('utf-8')) > size:
+            return f"longer than varchar({size})"
+    elif column_type in INT_RANGES:
+        if isinstance(value, bool) or isinstance(value, float):
+            return f"expected integer, got {type(value).__name__}"
+        try:
+            value = int(value)
+        except (TypeError, ValueError):
+            return f"expected integer, got {value!r}"
+        low, high = INT_RANGES[column_type]
+        if not low <= value <= high:
+            return f"out of {column_type} range"
+    elif column_type == 'numeric':
+        if isinstance(value, bool) or not isinstance(value, (int, float)):
+            return f"expected number, got {type(value).__name__}"
+        if abs(value) >= 10 ** size:
+            return f"out of numeric({size},0) range"
+    elif column_type == 'timestamp':
+        try:
+            datetime.fromisoformat(value)
+        except (TypeError, ValueError):
+            return f"expected timestamp, got {value!r}"
+    return None
+
+def validate_record(record, columns):
+    """Return the error messages of one JSON record against the columns."""
+    if not isinstance(record, dict):
+        return ["expected JSON object"]
+    errors = []
+    for column, (column_type, size) in columns.items():
+        error = validate_value(record.get(column), column_type, size)
+        if error:
+            errors.append(f"{column}: {error}")
+    return errors
+
+_s3 = None
+
+def _init_worker(aws_credentials_id):
+    global _s3
+    _s3 = S3Hook(aws_conn_id=aws_credentials_id)
+
+def _validate_file(args):
+    """Validate one S3 object in a pool worker.
+
+    Returns:
+        tuple: (key, clean lines or None when the whole file is clean,
+        quarantined records)
+    """
+    bucket, key, columns = args
+    clean_lines, bad_records = [], []
+    for line, record, error in iter_json_objects(_s3.read_key(key, bucket_name=bucket)):
+        errors = [error] if error else validate_record(record, columns)
+        if errors:
+            bad_records.append({'line': line, 'errors': errors})
+        else:
+            clean_lines.append(line)
+    return key, (clean_lines if bad_records else None), bad_records
+
+class ValidateJsonOperator(BaseOperator):
+    """Validate JSON files against the staging table columns before COPY.
+
+    Files are checked in a multiprocessing pool. Records that do not
+    fit the columns are moved to the quarantine prefix with their
+    errors, files with quarantined records are rewritten without them
+    under validated_key, and a COPY manifest listing only clean files is written to
+    manifest_key for StageToRedshiftOperator(use_manifest=True).
+    """
+
+    ui_color = '#D4A017'
+    template_fields = ("s3_key", "manifest_key", "quarantine_key", "validated_key")
+
+    @apply_defaults
+    def __init__(self,
+                 aws_credentials_id="",
+                 columns={},
+                 s3_bucket="",
+                 s3_key="",
+                 dest_s3_bucket="",
+                 manifest_key="",
+                 quarantine_key="",
+                 validated_key="",
+                 processes=None,
+                 *args, **kwargs):
+        super(ValidateJsonOperator, self).__init__(*args, **kwargs)
+        self.aws_credentials_id = aws_credentials_id
+        self.columns = columns
+        self.s3_bucket = s3_bucket
+        self.s3_key = s3_key
+        self.dest_s3_bucket = dest_s3_bucket
+        self.manifest_key = manifest_key
+        self.quarantine_key = quarantine_key
+        self.validated_key = validated_key
+        self.processes = processes or DEFAULT_PROCESSES
+
+    def execute(self, context):
+        s3 = S3Hook(aws_conn_id=self.aws_credentials_id)
+        rendered_key = self.s3_key.format(**context)
+        rendered_manifest_key = self.manifest_key.format(**context)
+        rendered_quarantine_key = self.quarantine_key.format(**context).rstrip('/')
+        rendered_validated_key = self.validated_key.format(**context).rstrip('/')
+
+        keys = [key for key in s3.list_keys(bucket_name=self.s3_bucket, prefix=rendered_key) or []
+                if key.endswith('.json')]
+        self.log.info(f"Validating {len(keys)} files from s3://{self.s3_bucket}/{rendered_key} "
+                      f"with {self.processes} processes")
+
+        started = time.monotonic()
+        entries = []
+        quarantined_files = quarantined_records = 0
+        with Pool(self.processes, initializer=_init_worker, initargs=(self.aws_credentials_id,)) as pool:
+            tasks = [(self.s3_bucket, key, self.columns) for key in keys]
+            for key, clean_lines, bad_records in pool.imap_unordered(_validate_file, tasks, chunksize=16):
+                if not bad_records:
+                    entries.append({'url': f"s3://{self.s3_bucket}/{key}", 'mandatory': True})
+                    continue
+                quarantined_files += 1
+                quarantined_records += len(bad_records)
+                s3.load_string(
+                    "\n".join(json.dumps(record) for record in bad_records),
+                    key=f"{rendered_quarantine_key}/{key}",
+                    bucket_name=self.dest_s3_bucket,
+                    replace=True
+                )
+                if clean_lines:
+                    clean_key = f"{rendered_validated_key}/{key}"
+                    s3.load_string("\n".join(clean_lines), key=clean_key,
+                                   bucket_name=self.dest_s3_bucket, replace=True)
+                    entries.append({'url': f"s3://{self.dest_s3_bucket}/{clean_key}", 'mandatory': True})
+                self.log.info(f"Quarantined {len(bad_records)} records of {key}: {bad_records[0]['errors']}")
+
+        s3.load_string(json.dumps({'entries': entries}), key=rendered_manifest_key,
+                       bucket_name=self.dest_s3_bucket, replace=True)
+        self.log.info(f"Validated {len(keys)} files in {time.monotonic() - started:.2f}s, "
+                      f"wrote manifest of {len(entries)} files to "
+                      f"s3://{self.dest_s3_bucket}/{rendered_manifest_key}, "
+                      f"quarantined {quarantined_records} records from {quarantined_files} files")
+        return f"s3://{self.dest_s3_bucket}/{rendered_manifest_key}"
@@ -0,0 +1,58 @@
+import os
+import shutil
+import sys
+
+import boto3
+import pytest
+from moto import mock_aws
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'plugins'))
+
+import cluster  # noqa: E402
+
+
+@pytest.fixture
+def config(tmp_path, monkeypatch):
+    """Config loaded from a scratch copy of dwh.cfg, cluster.py reads
+    and writes dwh.cfg in the working directory."""
+    shutil.copy(os.path.join(ROOT, 'dwh.cfg'), tmp_path / 'dwh.cfg')
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(cluster.time, 'sleep', lambda seconds: None)
+    return cluster.get_config()
+
+
+@pytest.fixture
+def redshift(config, monkeypatch):
+    """moto redshift client, also returned by boto3.client in cluster.py.
+
+    moto does not implement modify_cluster_parameter_group nor
+    resize_cluster, so both are stubbed and record their calls.
+    """
+    real_client = boto3.client
+    with mock_aws():
+        client = real_client('redshift', region_name=config.get('AWS_ACCESS', 'AWS_REGION'))
+        client.calls = {'modify_cluster_parameter_group': [], 'resize_cluster': []}
+        for name in client.calls:
+            monkeypatch.setattr(client, name,
+                                lambda _name=name, **kwargs: client.calls[_name].append(kwargs) or {})
+        monkeypatch.setattr(cluster.boto3, 'client',
+                            lambda service, **kwargs: client if service == 'redshift'
+                            else real_client(service, region_name=kwargs.get('region_name')))
+        yield client
+
+
+@pytest.fixture
+def create_cluster(config, redshift):
+    """Create the dwh.cfg cluster in moto with the given node count."""
+    def _create_cluster(node_count=4):
+        redshift.create_cluster(
+            ClusterIdentifier=config.get('CLUSTER', 'CLUSTER_IDENTIFIER'),
+            NodeType=config.get('CLUSTER', 'NODE_TYPE'),
+            MasterUsername=config.get('CLUSTER', 'DB_USER'),
+            MasterUserPassword=config.get('CLUSTER', 'DB_PASSWORD'),
+            ClusterType='multi-node',
+            NumberOfNodes=node_count
+        )
+    return _create_cluster
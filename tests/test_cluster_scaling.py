@@ -0,0 +1,190 @@
+import json
+
+import pytest
+
+import cluster
+
+
+def simulated_metrics(**overrides):
+    metrics = {'pending_runs': 0, 'queue_depth': 0, 'max_stage_seconds': 120, 'idle_minutes': 5}
+    metrics.update(overrides)
+    return metrics
+
+
+class FakeCursor:
+    """Cursor answering the get_pipeline_metrics queries in order."""
+
+    def __init__(self, rows):
+        self.rows = list(rows)
+
+    def execute(self, query):
+        pass
+
+    def fetchone(self):
+        return self.rows.pop(0)
+
+
+class FakeConnection:
+    def __init__(self, rows):
+        self.rows = rows
+
+    def cursor(self):
+        return FakeCursor(self.rows)
+
+    def close(self):
+        pass
+
+
+@pytest.mark.parametrize('metrics', [
+    simulated_metrics(pending_runs=6),
+    simulated_metrics(max_stage_seconds=900),
+])
+def test_decide_scaling_doubles_nodes_when_busy(config, metrics):
+    decision = cluster.decide_scaling(config, metrics, 'available', 4)
+
+    assert decision['action'] == 'resize'
+    assert decision['target_nodes'] == 8
+    assert decision['hourly_cost'] == 2.0
+
+
+def test_decide_scaling_halves_nodes_when_idle(config):
+    decision = cluster.decide_scaling(config, simulated_metrics(idle_minutes=60), 'available', 4)
+
+    assert decision['action'] == 'resize'
+    assert decision['target_nodes'] == 2
+
+
+def test_decide_scaling_pauses_idle_cluster_at_minimum(config):
+    decision = cluster.decide_scaling(config, simulated_metrics(idle_minutes=60), 'available', 2)
+
+    assert decision['action'] == 'pause'
+    assert decision['hourly_cost'] == 0
+
+
+def test_decide_scaling_keeps_idle_cluster_at_minimum_without_pause(config):
+    config.set('SCALING', 'PAUSE_WHEN_IDLE', 'false')
+
+    decision = cluster.decide_scaling(config, simulated_metrics(idle_minutes=60), 'available', 2)
+
+    assert decision['action'] == 'none'
+
+
+def test_decide_scaling_resumes_paused_cluster_with_work(config):
+    decision = cluster.decide_scaling(config, simulated_metrics(pending_runs=1), 'paused', 2)
+
+    assert decision['action'] == 'resume'
+    assert decision['hourly_cost'] == 0.5
+
+
+def test_decide_scaling_leaves_paused_cluster_without_work(config):
+    decision = cluster.decide_scaling(config, simulated_metrics(), 'paused', 2)
+
+    assert decision['action'] == 'none'
+    assert decision['hourly_cost'] == 0
+
+
+def test_decide_scaling_caps_nodes_by_hourly_cost(config):
+    config.set('SCALING', 'MAX_HOURLY_COST', '1.5')
+
+    grow = cluster.decide_scaling(config, simulated_metrics(pending_runs=10), 'available', 2)
+    capped = cluster.decide_scaling(config, simulated_metrics(pending_runs=10), 'available', 4)
+    over_cap = cluster.decide_scaling(config, simulated_metrics(pending_runs=10), 'available', 6)
+
+    assert (grow['action'], grow['target_nodes']) == ('resize', 4)
+    assert (capped['action'], capped['target_nodes']) == ('resize', 6)
+    assert over_cap['action'] == 'none'
+
+
+def test_decide_scaling_waits_while_cluster_is_busy_changing(config):
+    decision = cluster.decide_scaling(config, simulated_metrics(pending_runs=10), 'resizing', 4)
+
+    assert decision['action'] == 'none'
+
+
+def test_simulate_scaling_backfill_then_idle(config):
+    decisions = cluster.simulate_scaling(config, [
+        simulated_metrics(pending_runs=24),
+        simulated_metrics(pending_runs=12, max_stage_seconds=1200),
+        simulated_metrics(idle_minutes=60),
+        simulated_metrics(idle_minutes=120),
+        simulated_metrics(idle_minutes=180),
+        simulated_metrics(pending_runs=1),
+    ], node_count=4)
+
+    assert [(d['action'], d['target_nodes']) for d in decisions] == [
+        ('resize', 8), ('none', 8), ('resize', 4), ('resize', 2), ('pause', 2), ('resume', 2)
+    ]
+
+
+def test_log_scaling_decision_appends_json_lines(config):
+    metrics = simulated_metrics()
+    cluster.log_scaling_decision(config, metrics, {'action': 'none'})
+    cluster.log_scaling_decision(config, metrics, {'action': 'pause'})
+
+    with open(config.get('SCALING', 'DECISION_LOG')) as decision_log:
+        entries = [json.loads(line) for line in decision_log]
+    assert [entry['decision']['action'] for entry in entries] == ['none', 'pause']
+    assert entries[0]['metrics'] == metrics
+
+
+def test_apply_scaling_decision_resize(config, redshift, create_cluster):
+    create_cluster()
+
+    cluster.apply_scaling_decision(config, redshift, {'action': 'resize', 'target_nodes': 8, 'reason': ''})
+
+    resize_call, = redshift.calls['resize_cluster']
+    assert resize_call == {'ClusterIdentifier': config.get('CLUSTER', 'CLUSTER_IDENTIFIER'),
+                           'NumberOfNodes': 8, 'Classic': False}
+    assert cluster.get_config().get('CLUSTER', 'NODE_COUNT') == '8'
+
+
+def test_apply_scaling_decision_pause_and_resume(config, redshift, create_cluster):
+    create_cluster()
+
+    cluster.apply_scaling_decision(config, redshift, {'action': 'pause', 'target_nodes': 4, 'reason': ''})
+    assert cluster.check_redshift_cluster_status(config, redshift)['ClusterStatus'] == 'paused'
+
+    cluster.apply_scaling_decision(config, redshift, {'action': 'resume', 'target_nodes': 4, 'reason': ''})
+    assert cluster.check_redshift_cluster_status(config, redshift)['ClusterStatus'] == 'available'
+
+
+def test_autoscale_redshift_cluster_scales_down_idle_cluster(config, redshift, create_cluster, monkeypatch):
+    create_cluster()
+    # queued queries, slowest ETL query seconds, idle minutes
+    monkeypatch.setattr(cluster, 'connect_database', lambda: FakeConnection([(0,), (30,), (90,)]))
+
+    decision = cluster.autoscale_redshift_cluster(config)
+
+    assert (decision['action'], decision['target_nodes']) == ('resize', 2)
+    assert redshift.calls['resize_cluster'][0]['NumberOfNodes'] == 2
+    with open(config.get('SCALING', 'DECISION_LOG')) as decision_log:
+        entry = json.loads(decision_log.readline())
+    assert entry['metrics'] == simulated_metrics(max_stage_seconds=30, idle_minutes=90)
+
+
+def test_autoscale_redshift_cluster_dry_run(config, redshift, create_cluster, monkeypatch):
+    create_cluster()
+    monkeypatch.setattr(cluster, 'connect_database', lambda: FakeConnection([(0,), (30,), (90,)]))
+
+    decision = cluster.autoscale_redshift_cluster(config, dry_run=True)
+
+    assert decision['action'] == 'resize'
+    assert redshift.calls['resize_cluster'] == []
+
+
+def test_autoscale_redshift_cluster_resumes_for_backfill(config, redshift, create_cluster, monkeypatch):
+    create_cluster(node_count=2)
+    redshift.pause_cluster(ClusterIdentifier=config.get('CLUSTER', 'CLUSTER_IDENTIFIER'))
+
+    def connect_database():
+        raise AssertionError('paused cluster has no database to connect to')
+    monkeypatch.setattr(cluster, 'connect_database', connect_database)
+
+    decision = cluster.autoscale_redshift_cluster(config, pending_runs=12)
+
+    assert decision['action'] == 'resume'
+    assert cluster.check_redshift_cluster_status(config, redshift)['ClusterStatus'] == 'available'
+
+
+def test_autoscale_redshift_cluster_without_cluster(config, redshift):
+    assert cluster.autoscale_redshift_cluster(config) is None
@@ -0,0 +1,70 @@
+import json
+
+import cluster
+
+
+def test_build_wlm_configuration_with_short_query_acceleration(config):
+    wlm_configuration = cluster.build_wlm_configuration(config)
+
+    assert [queue.get('name') for queue in wlm_configuration] == ['etl', 'adhoc', 'Default queue', None]
+    assert wlm_configuration[0]['query_group'] == ['etl']
+    assert wlm_configuration[0]['priority'] == 'high'
+    assert wlm_configuration[0]['concurrency_scaling'] == 'auto'
+    assert wlm_configuration[1]['query_group'] == ['adhoc']
+    assert wlm_configuration[-1] == {'short_query_queue': True}
+
+
+def test_build_wlm_configuration_without_short_query_acceleration(config):
+    config.set('WLM', 'SHORT_QUERY_ACCELERATION', 'false')
+
+    wlm_configuration = cluster.build_wlm_configuration(config)
+
+    assert all('short_query_queue' not in queue for queue in wlm_configuration)
+    assert len(wlm_configuration) == 3
+
+
+def test_create_parameter_group(config, redshift):
+    name = cluster.create_parameter_group(config, redshift)
+
+    groups = redshift.describe_cluster_parameter_groups(ParameterGroupName=name)['ParameterGroups']
+    assert groups[0]['ParameterGroupFamily'] == config.get('WLM', 'PARAMETER_GROUP_FAMILY')
+    modify_call, = redshift.calls['modify_cluster_parameter_group']
+    parameters = {p['ParameterName']: p for p in modify_call['Parameters']}
+    assert modify_call['ParameterGroupName'] == name
+    assert json.loads(parameters['wlm_json_configuration']['ParameterValue']) == \
+        cluster.build_wlm_configuration(config)
+    assert parameters['wlm_json_configuration']['ApplyType'] == 'static'
+    assert parameters['max_concurrency_scaling_clusters']['ParameterValue'] == '1'
+
+
+def test_create_parameter_group_updates_existing_group(config, redshift):
+    cluster.create_parameter_group(config, redshift)
+    cluster.create_parameter_group(config, redshift)
+
+    assert len(redshift.describe_cluster_parameter_groups(
+        ParameterGroupName=config.get('WLM', 'PARAMETER_GROUP_NAME'))['ParameterGroups']) == 1
+    assert len(redshift.calls['modify_cluster_parameter_group']) == 2
+
+
+def test_create_redshift_cluster_uses_parameter_group(config, redshift):
+    iam_role = {'Role': {'Arn': 'arn:aws:iam::123456789012:role/redshiftS3Access'}}
+
+    cluster.create_redshift_cluster(config, None, iam_role)
+
+    cluster_status = cluster.check_redshift_cluster_status(config, redshift)
+    assert cluster_status['ClusterParameterGroups'][0]['ParameterGroupName'] == \
+        config.get('WLM', 'PARAMETER_GROUP_NAME')
+    assert cluster.get_config().get('CLUSTER', 'HOST') == cluster_status['Endpoint']['Address']
+
+
+def test_delete_parameter_group(config, redshift):
+    name = cluster.create_parameter_group(config, redshift)
+
+    cluster.delete_parameter_group(config)
+
+    assert name not in [group['ParameterGroupName'] for group in
+                        redshift.describe_cluster_parameter_groups()['ParameterGroups']]
+
+
+def test_create_bucket_uses_real_client_for_other_services(config, redshift):
+    assert cluster.create_bucket('sparkify-test-bucket', config)
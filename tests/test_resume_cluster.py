@@ -0,0 +1,53 @@
+import pytest
+
+pytest.importorskip('airflow')
+
+from airflow.exceptions import AirflowFailException  # noqa: E402
+from airflow.providers.amazon.aws.hooks.base_aws import AwsGenericHook  # noqa: E402
+
+from operators.resume_cluster import ResumeClusterOperator  # noqa: E402
+
+
+@pytest.fixture
+def resume_operator(config, redshift, monkeypatch):
+    monkeypatch.setattr(AwsGenericHook, 'get_conn', lambda hook: redshift)
+    return ResumeClusterOperator(
+        task_id='Resume_cluster',
+        cluster_identifier=config.get('CLUSTER', 'CLUSTER_IDENTIFIER'),
+        region=config.get('AWS_ACCESS', 'AWS_REGION'),
+        poke_interval=0
+    )
+
+
+def cluster_status(config, redshift):
+    return redshift.describe_clusters(
+        ClusterIdentifier=config.get('CLUSTER', 'CLUSTER_IDENTIFIER'))['Clusters'][0]['ClusterStatus']
+
+
+def test_resume_paused_cluster(config, redshift, create_cluster, resume_operator):
+    create_cluster()
+    redshift.pause_cluster(ClusterIdentifier=config.get('CLUSTER', 'CLUSTER_IDENTIFIER'))
+
+    resume_operator.execute({})
+
+    assert cluster_status(config, redshift) == 'available'
+
+
+def test_available_cluster_is_left_alone(config, redshift, create_cluster, resume_operator, monkeypatch):
+    create_cluster()
+    monkeypatch.setattr(redshift, 'resume_cluster', lambda **kwargs: pytest.fail('resumed available cluster'))
+
+    resume_operator.execute({})
+
+
+def test_fail_fast_on_terminal_state(config, redshift, create_cluster, resume_operator, monkeypatch):
+    create_cluster()
+    monkeypatch.setattr(redshift, 'describe_clusters',
+                        lambda **kwargs: {'Clusters': [{'ClusterStatus': 'deleting'}]})
+
+    with pytest.raises(AirflowFailException):
+        resume_operator.execute({})
+
+
+def test_skip_without_cluster_identifier():
+    ResumeClusterOperator(task_id='Resume_cluster', cluster_identifier='').execute({})
@@ -0,0 +1,51 @@
+import pytest
+
+pytest.importorskip('airflow')
+
+from operators.table_maintenance import TableMaintenanceOperator  # noqa: E402
+
+
+def maintenance_operator(backend='redshift'):
+    return TableMaintenanceOperator(
+        task_id='Run_table_maintenance',
+        tables=['songplays'],
+        backend=backend,
+        unsorted_pct_threshold=10,
+        stats_off_pct_threshold=10,
+        deleted_pct_threshold=5
+    )
+
+
+@pytest.mark.parametrize('backend, health, expected', [
+    ('redshift', ('songplays', 2, 3, 1), []),
+    ('redshift', ('songplays', 25, 3, 1), ['VACUUM SORT ONLY public."songplays";']),
+    ('redshift', ('songplays', 2, 3, 8), ['VACUUM DELETE ONLY public."songplays";']),
+    ('redshift', ('songplays', 2, 30, 1), ['ANALYZE public."songplays" PREDICATE COLUMNS;']),
+    ('redshift', ('songplays', 25, 30, 8), ['VACUUM SORT ONLY public."songplays";',
+                                            'VACUUM DELETE ONLY public."songplays";',
+                                            'ANALYZE public."songplays" PREDICATE COLUMNS;']),
+    ('redshift', ('songplays', 10, 10, 5), []),
+    ('postgres', ('songplays', 0, 3, 8), ['VACUUM public."songplays";']),
+    ('postgres', ('songplays', 0, 30, 1), ['ANALYZE public."songplays";']),
+    ('postgres', ('songplays', 90, 3, 1), []),
+])
+def test_plan_maintenance(backend, health, expected):
+    plan = maintenance_operator(backend).plan_maintenance([health])
+
+    assert [statement for table, statement in plan] == expected
+    assert all(table == 'songplays' for table, statement in plan)
+
+
+def test_plan_maintenance_never_sorts_on_postgres():
+    plan = maintenance_operator('postgres').plan_maintenance([
+        ('songplays', 100, 100, 100),
+        ('users', 50, 0, 0)
+    ])
+
+    assert plan
+    assert not any('SORT' in statement for table, statement in plan)
+
+
+def test_unsupported_backend():
+    with pytest.raises(ValueError):
+        maintenance_operator('mysql')
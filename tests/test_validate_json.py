@@ -0,0 +1,112 @@
+import json
+
+import pytest
+
+pytest.importorskip('airflow')
+
+from helpers.staging_schemas import StagingSchemas  # noqa: E402
+from operators.transform_events import transform_lines  # noqa: E402
+from operators.validate_json import iter_json_objects, validate_record, validate_value  # noqa: E402
+
+
+@pytest.mark.parametrize('value, column_type, size', [
+    (None, 'varchar', 256),
+    ('a' * 256, 'varchar', 256),
+    ('é' * 128, 'varchar', 256),
+    (2**31 - 1, 'int4', None),
+    (-2**31, 'int4', None),
+    ('39', 'int4', None),
+    (2**63 - 1, 'int8', None),
+    (10**18 - 1, 'numeric', 18),
+    (218.93179, 'numeric', 18),
+    ('2018-11-01 21:01:46', 'timestamp', None),
+])
+def test_validate_value_accepts(value, column_type, size):
+    assert validate_value(value, column_type, size) is None
+
+
+@pytest.mark.parametrize('value, column_type, size', [
+    ('a' * 257, 'varchar', 256),
+    ('é' * 129, 'varchar', 256),
+    (12, 'varchar', 256),
+    (2**31, 'int4', None),
+    (-2**31 - 1, 'int4', None),
+    (2**63, 'int8', None),
+    (True, 'int4', None),
+    (1.5, 'int4', None),
+    ('x', 'int4', None),
+    (10**18, 'numeric', 18),
+    (False, 'numeric', 18),
+    ('1.5', 'numeric', 18),
+    ('yesterday', 'timestamp', None),
+    (1541106106, 'timestamp', None),
+])
+def test_validate_value_rejects(value, column_type, size):
+    assert validate_value(value, column_type, size)
+
+
+def test_validate_record_reports_every_bad_column():
+    errors = validate_record({'num_songs': 1, 'artist_id': 'a' * 300, 'year': 'x', 'duration': 1.5},
+                             StagingSchemas.staging_songs)
+
+    assert errors == ['artist_id: longer than varchar(256)', "year: expected integer, got 'x'"]
+
+
+def test_validate_record_ignores_missing_and_extra_fields():
+    assert validate_record({'song_id': 'SOABC', 'unknown': [1, 2]}, StagingSchemas.staging_songs) == []
+
+
+def test_validate_record_rejects_non_objects():
+    assert validate_record([1, 2], StagingSchemas.staging_songs) == ["expected JSON object"]
+
+
+def test_iter_json_objects_reads_multi_line_objects():
+    content = '{"a": 1}\n{\n  "b": [1,\n    2]\n}{"c": 3}\n\n'
+
+    assert [(obj, error) for text, obj, error in iter_json_objects(content)] == [
+        ({'a': 1}, None), ({'b': [1, 2]}, None), ({'c': 3}, None)
+    ]
+
+
+def test_iter_json_objects_resumes_after_bad_line():
+    parsed = list(iter_json_objects('{"a": 1}\n{bad json\n{"c": 3}'))
+
+    assert [obj for text, obj, error in parsed] == [{'a': 1}, None, {'c': 3}]
+    assert parsed[1][0] == '{bad json'
+    assert parsed[1][2].startswith('invalid JSON')
+
+
+def log_event(**overrides):
+    event = {'page': 'NextSong', 'userId': '39', 'ts': 1541106106796, 'sessionId': 38,
+             'artist': 'Sydney Youngblood', 'song': 'Ain\'t No Sunshine', 'length': 238.07,
+             'firstName': 'Lily', 'lastName': 'Koch', 'gender': 'F', 'level': 'paid',
+             'location': 'Chicago', 'userAgent': 'Mozilla/5.0', 'auth': 'Logged In'}
+    event.update(overrides)
+    return json.dumps(event)
+
+
+def test_transform_lines_keeps_next_song_records():
+    records, bad_records, rows_in = transform_lines(
+        "\n".join([log_event(), log_event(page='Home'), log_event(userId='')]), 'NextSong')
+
+    assert rows_in == 3
+    assert bad_records == []
+    record, = [json.loads(record) for record in records]
+    assert record['userid'] == 39
+    assert record['start_time'] == '2018-11-01 21:01:46'
+    assert 'auth' not in record and 'page' not in record
+
+
+@pytest.mark.parametrize('line, error', [
+    ('{"page": "NextSong", ', 'invalid JSON'),
+    (log_event(ts=None), 'ts: expected integer'),
+    (log_event(userId='abc'), 'userId: expected integer'),
+    (log_event(artist='a' * 300), 'artist: longer than varchar(256)'),
+])
+def test_transform_lines_quarantines_bad_records(line, error):
+    records, bad_records, rows_in = transform_lines(line + "\n" + log_event(), 'NextSong')
+
+    assert len(records) == 1
+    bad_record, = bad_records
+    assert bad_record['errors'][0].startswith(error)
+    assert bad_record['line'].strip() == line.strip()